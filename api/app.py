@@ -3,15 +3,30 @@ import sys
 import uuid
 import time
 import shutil
+import hashlib
+from email.utils import formatdate
 import logging
 import tempfile
 import asyncio  
+import json
+import multiprocessing
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import lru_cache
+from itertools import chain
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Deque, List, Dict, Optional, Tuple
 
+import aiofiles
+from arq import create_pool
+from arq.connections import RedisSettings
+from arq.jobs import Job
+from cachetools import TTLCache
+import redis.asyncio as aioredis
 import uvicorn
 from fastapi import FastAPI, File, UploadFile, BackgroundTasks, Form, HTTPException, Request
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import FileResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
@@ -21,7 +36,7 @@ from starlette.responses import Response
 
 # Import the PDF processor
 sys.path.append(str(Path(__file__).parent.parent))
-from preprocessing.preprocess import PDFProcessor
+from preprocessing.preprocess import PDFProcessor, evict_cached_document
 
 # Configure logging
 logging.basicConfig(
@@ -39,6 +54,7 @@ app = FastAPI(
     title="PDF Processing API",
     description="API for extracting text from PDF documents",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
 )
 
 # CORS middleware to allow requests from the frontend
@@ -52,47 +68,134 @@ app.add_middleware(
 
 # Rate limiting middleware
 class RateLimitMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app, max_requests: int = 10, window_seconds: int = 60):
+    """
+    Per-IP token bucket: bursts up to max_requests, refilled over window_seconds.
+    When Redis is configured, a fixed-window counter shared by all workers is used instead.
+    """
+    def __init__(self, app, max_requests: int = 10, window_seconds: int = 60,
+                 sweep_interval: int = 60, idle_seconds: int = 600):
         super().__init__(app)
         self.max_requests = max_requests
         self.window_seconds = window_seconds
-        self.requests = {}
+        self.capacity = float(max_requests)
+        self.refill_rate = max_requests / window_seconds  # tokens per second
+        self.sweep_interval = sweep_interval
+        self.idle_seconds = idle_seconds
+        self.buckets: Dict[str, Tuple[float, float]] = {}  # ip -> (tokens, last refill)
+        self._sweep_task: Optional[asyncio.Task] = None
 
     async def dispatch(self, request: Request, call_next):
+        redis = getattr(request.app.state, "redis", None)
+        if redis is not None:
+            return await self._dispatch_shared(redis, request, call_next)
+        
+        if self._sweep_task is None:
+            self._sweep_task = asyncio.create_task(self._sweep_idle_buckets())
+        
         client_ip = request.client.host
-        current_time = time.time()
+        now = time.monotonic()
         
-        # Clean up old entries
-        self.requests = {k: v for k, v in self.requests.items() 
-                        if current_time - v[-1] < self.window_seconds}
+        # Refill lazily based on the time since this client's last request
+        tokens, last = self.buckets.get(client_ip, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - last) * self.refill_rate)
         
-        # Check if client exceeded rate limit
-        if client_ip in self.requests:
-            if len(self.requests[client_ip]) >= self.max_requests:
-                return JSONResponse(
-                    status_code=429,
-                    content={"detail": "Rate limit exceeded. Try again later."}
-                )
-            self.requests[client_ip].append(current_time)
-        else:
-            self.requests[client_ip] = [current_time]
+        if tokens < 1:
+            self.buckets[client_ip] = (tokens, now)
+            return ORJSONResponse(
+                status_code=429,
+                content={"detail": "Rate limit exceeded. Try again later."}
+            )
+        
+        self.buckets[client_ip] = (tokens - 1, now)
+        return await call_next(request)
+
+    async def _dispatch_shared(self, redis, request: Request, call_next):
+        """Fixed-window counter in Redis so the limit holds across workers"""
+        window = int(time.time() // self.window_seconds)
+        key = f"ratelimit:{request.client.host}:{window}"
+        
+        async with redis.pipeline(transaction=True) as pipe:
+            count, _ = await pipe.incr(key).expire(key, self.window_seconds).execute()
+        
+        if count > self.max_requests:
+            return ORJSONResponse(
+                status_code=429,
+                content={"detail": "Rate limit exceeded. Try again later."}
+            )
         
         return await call_next(request)
 
+    async def _sweep_idle_buckets(self):
+        """Periodically evict buckets of clients that have been idle for a while"""
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            cutoff = time.monotonic() - self.idle_seconds
+            for ip in [ip for ip, (_, last) in self.buckets.items() if last < cutoff]:
+                del self.buckets[ip]
+
 app.add_middleware(RateLimitMiddleware, max_requests=5, window_seconds=10)
 
 # Create directory for storing uploads and results
 UPLOAD_DIR = Path("./uploads")
 RESULTS_DIR = Path("./results")
+CACHE_DIR = Path("./cache")  # results keyed on upload content hash and options
 UPLOAD_DIR.mkdir(exist_ok=True)
 RESULTS_DIR.mkdir(exist_ok=True)
+CACHE_DIR.mkdir(exist_ok=True)
+
+# Uploads, results and cache entries older than this are swept every SWEEP_INTERVAL_SECONDS;
+# the cache, whose entries are hard links shared with results, is also trimmed to CACHE_MAX_BYTES
+FILE_MAX_AGE_SECONDS = 3600
+CACHE_MAX_BYTES = 1 << 30
+SWEEP_INTERVAL_SECONDS = 600
+
+# Uploads are streamed to disk in 1 MiB chunks through a small pool of reusable buffers
+UPLOAD_CHUNK_SIZE = 1 << 20
+MAX_POOLED_BUFFERS = 16
+_upload_buffers: Deque[bytearray] = deque()
+
+# Results smaller than this are served from an in-process LRU (at most 64 MiB in total)
+SMALL_RESULT_BYTES = 4 << 20
+SMALL_RESULT_CACHE_ENTRIES = 16
 
 # Mount static files and templates
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 
-# In-memory task storage
-tasks = {}
+# Shared task storage in Redis, required when running more than one worker
+REDIS_URL = os.getenv("REDIS_URL")
+TASK_TTL_SECONDS = 3600
+
+# One server worker per core when task state is shared through Redis
+WEB_WORKERS = (os.cpu_count() or 1) if REDIS_URL else 1
+
+# Hand processing to arq workers (`python -m arq api.app.WorkerSettings`) instead of
+# running it inside the API process; requires REDIS_URL
+USE_TASK_QUEUE = bool(REDIS_URL) and os.getenv("USE_TASK_QUEUE", "").lower() in ("1", "true", "yes")
+
+# Maximum number of tasks kept in process memory
+MAX_LOCAL_TASKS = 10_000
+
+# In-memory task storage with expiry, used when Redis is not configured. With Redis,
+# every lookup goes to Redis: tasks are still updated (and deleted) after they finish
+tasks: "TTLCache[str, TaskStatus]" = TTLCache(maxsize=MAX_LOCAL_TASKS, ttl=TASK_TTL_SECONDS)
+
+FINISHED_STATUSES = ("completed", "failed")
+
+# Task fields written by each kind of update
+STATUS_FIELDS = ("status", "progress", "message")
+PROGRESS_FIELDS = ("progress", "message")
+RESULT_FIELDS = STATUS_FIELDS + ("result_file", "result_filename", "result_size", "result_mtime", "media_type")
+
+# Updates a task's hash fields (ARGV[2:]) and refreshes its TTL (ARGV[1]), only if it still exists
+UPDATE_TASK_SCRIPT = """
+if redis.call('exists', KEYS[1]) == 0 then
+    return 0
+end
+redis.call('hset', KEYS[1], unpack(ARGV, 2))
+redis.call('expire', KEYS[1], ARGV[1])
+return 1
+"""
 
 class TaskStatus(BaseModel):
     """Model for task status updates"""
@@ -100,13 +203,60 @@ class TaskStatus(BaseModel):
     status: str  # "pending", "processing", "completed", "failed"
     progress: int  # 0-100
     result_file: Optional[str] = None
+    result_filename: Optional[str] = None  # download name, recorded on completion
+    result_size: Optional[int] = None  # bytes, recorded on completion
+    result_mtime: Optional[float] = None
+    media_type: Optional[str] = None
     message: Optional[str] = None
     scheduled_for_deletion: bool = False  # Add this line
 
+async def get_task(task_id: str) -> Optional[TaskStatus]:
+    """Look up a task in Redis when configured, otherwise in local memory"""
+    redis = app.state.redis
+    if redis is None:
+        return tasks.get(task_id)
+    
+    raw = await redis.hgetall(f"task:{task_id}")
+    if not raw:
+        return None
+    
+    return TaskStatus(**{field: json.loads(value) for field, value in raw.items()})
+
+async def save_task(task: TaskStatus, *fields: str):
+    """
+    Store a new task, or update only the given fields of an existing one.
+    Updates to a task that has been deleted in the meantime are dropped.
+    """
+    redis = app.state.redis
+    if redis is None:
+        if not fields or task.task_id in tasks:
+            tasks[task.task_id] = task
+        return
+    
+    # Fields are stored JSON-encoded in a hash, so concurrent writers only overwrite what they changed
+    key = f"task:{task.task_id}"
+    values = jsonable_encoder(task, include=set(fields) if fields else None)
+    mapping = {field: json.dumps(value) for field, value in values.items()}
+    if fields:
+        await app.state.update_task_script(
+            keys=[key], args=[TASK_TTL_SECONDS, *chain.from_iterable(mapping.items())]
+        )
+    else:
+        async with redis.pipeline(transaction=True) as pipe:
+            await pipe.hset(key, mapping=mapping).expire(key, TASK_TTL_SECONDS).execute()
+
+async def remove_task(task_id: str):
+    """Forget a task"""
+    redis = app.state.redis
+    if redis is None:
+        tasks.pop(task_id, None)
+    else:
+        await redis.delete(f"task:{task_id}")
+
 class ProcessingOptions(BaseModel):
     """Model for PDF processing options"""
     output_format: str = "csv"
-    extraction_method: str = "auto"
+    extraction_method: str = "pymupdf"
     include_metadata: bool = True
     text_only: bool = False
 
@@ -122,7 +272,7 @@ async def upload_file(
     file: UploadFile = File(...),
     background_tasks: BackgroundTasks = BackgroundTasks(),
     output_format: str = Form("csv"),
-    extraction_method: str = Form("auto"),
+    extraction_method: str = Form("pymupdf"),
     include_metadata: bool = Form(True),
     text_only: bool = Form(False),
 ):
@@ -139,71 +289,158 @@ async def upload_file(
     upload_path = UPLOAD_DIR / f"{task_id}.pdf"
     result_path = RESULTS_DIR / f"{task_id}.{output_format}"
     
+    buf = _rent_buffer()
+    content_hash = hashlib.sha256()
     try:
-        with open(upload_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        async with aiofiles.open(upload_path, "wb") as out:
+            while n := await asyncio.to_thread(_read_into, file.file, buf, content_hash):
+                await out.write(memoryview(buf)[:n])
     except Exception as e:
+        _return_buffer(buf)
         logger.error(f"Failed to save uploaded file: {str(e)}")
         raise HTTPException(status_code=500, detail=f"File upload failed: {str(e)}")
     
+    # Only returned once no read or write is using it: when the request is cancelled, the
+    # buffer is dropped instead, as cancelling does not stop a worker thread still filling it
+    _return_buffer(buf)
+    
+    # The output names the file as uploaded, never by its task id: task ids are the only
+    # credential for a task, and cached results are handed to other uploaders
+    source_name = os.path.basename(file.filename)
+    
+    # Identical content, name and options give an identical result
+    content_hash.update(
+        f"|{source_name}|{output_format}|{extraction_method}|{include_metadata}|{text_only}".encode()
+    )
+    cache_file = CACHE_DIR / f"{content_hash.hexdigest()}{result_path.suffix}"
+    
     # Initialize task status
-    tasks[task_id] = TaskStatus(
+    task = TaskStatus(
         task_id=task_id,
         status="pending",
         progress=0,
         message="Preparing to process PDF"
     )
     
-    # Start processing in background
-    background_tasks.add_task(
-        process_pdf,
-        task_id,
-        upload_path,
-        result_path,
-        output_format,
-        extraction_method,
-        include_metadata,
-        text_only
-    )
+    stat_result = await asyncio.to_thread(_restore_cached_result, cache_file, upload_path, result_path)
+    if stat_result is not None:
+        _mark_completed(task, str(result_path), stat_result)
+        await save_task(task)
+        logger.info(f"Task {task_id} served from result cache")
+        return {"task_id": task_id, "message": "PDF uploaded successfully. Processing started."}
+    
+    await save_task(task)
+    
+    # Start processing on the task queue if enabled, otherwise in the background
+    if app.state.arq is not None:
+        await app.state.arq.enqueue_job(
+            "process_pdf_job",
+            task_id,
+            str(upload_path),
+            str(result_path),
+            output_format,
+            extraction_method,
+            include_metadata,
+            text_only,
+            str(cache_file),
+            source_name,
+            _job_id=task_id
+        )
+    else:
+        background_tasks.add_task(
+            process_pdf,
+            task_id,
+            upload_path,
+            result_path,
+            output_format,
+            extraction_method,
+            include_metadata,
+            text_only,
+            cache_file,
+            source_name
+        )
     
     return {"task_id": task_id, "message": "PDF uploaded successfully. Processing started."}
 
 @app.get("/api/status/{task_id}")
-async def get_task_status(task_id: str):
+async def get_task_status(task_id: str, request: Request, response: Response):
     """Check the status of a processing task"""
-    if task_id not in tasks:
+    task = await get_task(task_id)
+    if task is None:
         raise HTTPException(status_code=404, detail=f"Task {task_id} not found")
     
-    return tasks[task_id]
+    # Status changes while processing; never serve it from a cache without revalidating
+    headers = {"Cache-Control": "no-cache", "ETag": f'"{task.status}:{task.progress}"'}
+    
+    # Pollers that already have this status get an empty 304 instead of the full body
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and headers["ETag"] in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    
+    response.headers.update(headers)
+    return task
 
 @app.get("/api/download/{task_id}")
 async def download_result(task_id: str):
     """Download the processed result file"""
-    if task_id not in tasks:
+    task = await get_task(task_id)
+    if task is None:
         raise HTTPException(status_code=404, detail=f"Task {task_id} not found")
     
-    task = tasks[task_id]
     if task.status != "completed":
         raise HTTPException(status_code=400, detail="Processing not yet completed")
     
-    if not task.result_file or not os.path.exists(task.result_file):
+    if not task.result_file or task.result_size is None:
+        raise HTTPException(status_code=404, detail="Result file not found")
+    
+    filename = task.result_filename
+    
+    # Small results are served from memory; large ones go through FileResponse, which
+    # uses the server's zero-copy pathsend extension when available.
+    # A result file can be gone (task deleted, stale-file sweep), which is a 404 either way
+    if task.result_size < SMALL_RESULT_BYTES:
+        try:
+            content = await asyncio.to_thread(_load_small_result, task.result_file, task.result_mtime)
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail="Result file not found")
+        return Response(
+            content=content,
+            media_type=task.media_type,
+            headers={
+                "Content-Disposition": f'attachment; filename="{filename}"',
+                # Size and mtime were recorded on completion, so no stat call is needed here
+                "Last-Modified": formatdate(task.result_mtime, usegmt=True),
+            }
+        )
+    
+    # One stat, off the event loop; FileResponse reuses it for its headers instead of stat-ing again
+    try:
+        stat_result = await asyncio.to_thread(os.stat, task.result_file)
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Result file not found")
     
     return FileResponse(
         path=task.result_file,
-        filename=os.path.basename(task.result_file),
-        media_type=_get_media_type(task.result_file)
+        filename=filename,
+        media_type=task.media_type,
+        stat_result=stat_result,
     )
 
 @app.delete("/api/tasks/{task_id}")
 async def delete_task(task_id: str, background_tasks: BackgroundTasks):
     """Delete a task and its associated files"""
-    if task_id not in tasks:
+    task = await get_task(task_id)
+    if task is None:
         raise HTTPException(status_code=404, detail=f"Task {task_id} not found")
     
     try:
-        # Mark for deletion without removing from tasks dict yet
-        tasks[task_id].scheduled_for_deletion = True
+        # Mark for deletion without removing from task storage yet
+        task.scheduled_for_deletion = True
+        await save_task(task, "scheduled_for_deletion")
+        
+        # Stop queued or running processing jobs
+        if app.state.arq is not None and task.status not in FINISHED_STATUSES:
+            background_tasks.add_task(abort_job, task_id)
         
         # Schedule actual deletion for later (e.g., 5 minutes)
         background_tasks.add_task(delayed_delete_task, task_id, delay=300)
@@ -213,26 +450,31 @@ async def delete_task(task_id: str, background_tasks: BackgroundTasks):
         logger.error(f"Error scheduling task deletion {task_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error scheduling task deletion: {str(e)}")
 
+async def abort_job(task_id: str):
+    """Abort the processing job of a task on the task queue"""
+    try:
+        await Job(task_id, app.state.arq).abort(timeout=30)
+    except asyncio.TimeoutError:
+        logger.warning(f"Timed out waiting for job {task_id} to abort")
+    except Exception as e:
+        logger.error(f"Error aborting job {task_id}: {str(e)}")
+
 async def delayed_delete_task(task_id: str, delay: int):
     """Delete a task after a delay"""
     await asyncio.sleep(delay)
     
     try:
-        if task_id not in tasks:
+        task = await get_task(task_id)
+        if task is None:
             return
         
-        # Delete uploaded file
-        upload_path = UPLOAD_DIR / f"{task_id}.pdf"
-        if upload_path.exists():
-            upload_path.unlink()
+        # Delete uploaded and result files, off the event loop
+        await asyncio.to_thread(_remove_files, UPLOAD_DIR / f"{task_id}.pdf", task.result_file)
+        if task.result_file:
+            _load_small_result.cache_clear()
         
-        # Delete result file if exists
-        task = tasks[task_id]
-        if task.result_file and os.path.exists(task.result_file):
-            os.unlink(task.result_file)
-        
-        # Remove task from memory
-        del tasks[task_id]
+        # Remove task from storage
+        await remove_task(task_id)
         
         logger.info(f"Task {task_id} deleted after delay")
     except Exception as e:
@@ -246,16 +488,25 @@ async def process_pdf(
     output_format: str,
     extraction_method: str,
     include_metadata: bool,
-    text_only: bool
+    text_only: bool,
+    cache_file: Optional[Path] = None,
+    source_name: Optional[str] = None
 ):
     """Process PDF in the background and update task status"""
     logger.info(f"Processing PDF {pdf_path} with task ID {task_id}")
+    task = await get_task(task_id)
+    if task is None:
+        # Deleted or expired before processing started; nobody is left to collect a result
+        logger.warning(f"Task {task_id} no longer exists; skipping processing")
+        await asyncio.to_thread(_remove_files, pdf_path)
+        return
     
     try:
         # Update task status to processing
-        tasks[task_id].status = "processing"
-        tasks[task_id].progress = 10
-        tasks[task_id].message = "Processing started"
+        task.status = "processing"
+        task.progress = 10
+        task.message = "Processing started"
+        await save_task(task, *STATUS_FIELDS)
         
         # Initialize processor
         processor = PDFProcessor(
@@ -264,71 +515,323 @@ async def process_pdf(
             max_workers=2,  # Lower worker count for server environment
             extraction_method=extraction_method,
             include_metadata=include_metadata,
-            text_only=text_only
+            text_only=text_only,
+            page_executor=app.state.page_executor
         )
         
         # Process file with progress updates
-        tasks[task_id].progress = 20
-        tasks[task_id].message = "Validating PDF"
+        task.progress = 20
+        task.message = "Validating PDF"
+        await save_task(task, *PROGRESS_FIELDS)
+        
+        # Pages are reported from the processing thread as they are extracted and written
+        loop = asyncio.get_running_loop()
+        progress_saves = []
+        
+        def report_progress(pages_done: int, total_pages: int):
+            progress = 20 + 75 * pages_done // max(total_pages, 1)
+            if progress != task.progress:
+                task.progress = progress
+                task.message = f"Extracted {pages_done} of {total_pages} pages"
+                progress_saves.append(asyncio.run_coroutine_threadsafe(save_task(task, *PROGRESS_FIELDS), loop))
         
-        # Process the file
-        result_file = processor.process_file(pdf_path, str(result_path))
+        # Process the file in a worker thread so the event loop stays responsive
+        try:
+            result_file = await asyncio.to_thread(
+                processor.process_file, pdf_path, str(result_path), report_progress,
+                source_name or "upload.pdf"
+            )
+        finally:
+            # Let in-flight progress updates land before the final status is saved
+            await asyncio.gather(*map(asyncio.wrap_future, progress_saves), return_exceptions=True)
+            
+            # A page worker died during extraction; give later tasks a working pool
+            if processor.page_executor_broken:
+                _replace_page_executor(processor.page_executor)
         
         # Check if processing was successful
-        if result_file and os.path.exists(result_file):
-            tasks[task_id].status = "completed"
-            tasks[task_id].progress = 100
-            tasks[task_id].result_file = result_file
-            tasks[task_id].message = "Processing completed successfully"
+        stat_result = await asyncio.to_thread(_stat_if_exists, result_file) if result_file else None
+        
+        if stat_result is not None and not processor.extraction_error:
+            _mark_completed(task, result_file, stat_result)
             logger.info(f"Task {task_id} completed successfully")
+            
+            # Keep the result for identical uploads (unless the processor changed its format);
+            # output with pages lost to extraction errors is not reused
+            if cache_file is not None and result_file == str(result_path) and not processor.failed_pages:
+                await asyncio.to_thread(_cache_result, result_path, cache_file)
+        elif processor.extraction_error:
+            # The output only holds an error row; don't hand it out as a result
+            await asyncio.to_thread(_remove_files, result_file)
+            task.status = "failed"
+            task.progress = 0
+            task.message = f"Processing failed: {processor.extraction_error}"
+            logger.error(f"Task {task_id} failed - {processor.extraction_error}")
         else:
-            tasks[task_id].status = "failed"
-            tasks[task_id].progress = 0
-            tasks[task_id].message = "Processing failed - no output file generated"
+            task.status = "failed"
+            task.progress = 0
+            task.message = "Processing failed - no output file generated"
             logger.error(f"Task {task_id} failed - no output file generated")
+        
+        await save_task(task, *RESULT_FIELDS)
             
     except Exception as e:
         logger.error(f"Error processing PDF for task {task_id}: {str(e)}")
-        tasks[task_id].status = "failed"
-        tasks[task_id].progress = 0
-        tasks[task_id].message = f"Processing failed: {str(e)}"
+        task.status = "failed"
+        task.progress = 0
+        task.message = f"Processing failed: {str(e)}"
+        await save_task(task, *STATUS_FIELDS)
     finally:
-        # Clean up the temporary file
+        # Clean up the temporary file, closing the processor's cached handle on it first
         try:
-            if os.path.exists(pdf_path):
-                os.unlink(pdf_path)
+            evict_cached_document(pdf_path)
+            await asyncio.to_thread(_remove_files, pdf_path)
         except Exception as e:
             logger.warning(f"Error cleaning up temporary file {pdf_path}: {str(e)}")
 
+def _rent_buffer() -> bytearray:
+    """Take an upload buffer from the pool, allocating one if the pool is empty"""
+    try:
+        return _upload_buffers.pop()
+    except IndexError:
+        return bytearray(UPLOAD_CHUNK_SIZE)
+
+def _return_buffer(buf: bytearray):
+    """Give an upload buffer back to the pool"""
+    if len(_upload_buffers) < MAX_POOLED_BUFFERS:
+        _upload_buffers.append(buf)
+
+def _read_into(fileobj, buf: bytearray, content_hash) -> int:
+    """Read the next upload chunk into buf and add it to the content hash"""
+    # Upload spool files only implement readinto themselves from Python 3.11
+    readinto = getattr(fileobj, "readinto", None) or fileobj._file.readinto
+    n = readinto(buf)
+    content_hash.update(memoryview(buf)[:n])
+    return n
+
+def _link_or_copy(src: Path, dst: Path):
+    """Hard-link src to dst, copying when linking is not possible"""
+    try:
+        os.link(src, dst)
+    except (FileExistsError, FileNotFoundError):
+        raise
+    except OSError:
+        shutil.copyfile(src, dst)
+
+def _restore_cached_result(cache_file: Path, upload_path: Path,
+                           result_path: Path) -> Optional[os.stat_result]:
+    """
+    Use a cached result for this upload if there is one, removing the no longer needed upload.
+    Returns the restored result's stat, or None if nothing is cached
+    """
+    try:
+        _link_or_copy(cache_file, result_path)
+    except FileNotFoundError:
+        return None
+    
+    # A hard link shares the cache entry's mtime, which the sweep goes by; restart it so the
+    # result is kept as long as a freshly processed one (and the entry, in use again, too)
+    os.utime(result_path)
+    upload_path.unlink(missing_ok=True)
+    return os.stat(result_path)
+
+def _cache_result(result_path: Path, cache_file: Path):
+    """Add a result to the result cache"""
+    try:
+        _link_or_copy(result_path, cache_file)
+    except FileExistsError:
+        pass
+    except Exception as e:
+        logger.warning(f"Error caching result {result_path}: {str(e)}")
+
+def _stat_if_exists(path: str) -> Optional[os.stat_result]:
+    """Stat a file, or return None if it does not exist"""
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        return None
+
+def _remove_files(*paths):
+    """Delete the given files, skipping empty paths and files that are already gone"""
+    for path in paths:
+        if path:
+            Path(path).unlink(missing_ok=True)
+
+def _remove_stale_files(directory: Path, max_age: float, max_bytes: Optional[int] = None):
+    """
+    Delete files in a directory that were last modified more than max_age seconds ago, then,
+    if max_bytes is given, the oldest of the rest until they fit in max_bytes.
+    Files removed concurrently (e.g. by another server worker) are skipped.
+    """
+    files = []
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            try:
+                if entry.is_file():
+                    stat_result = entry.stat()
+                    files.append((stat_result.st_mtime, stat_result.st_size, entry.path))
+            except FileNotFoundError:
+                pass
+    
+    cutoff = time.time() - max_age
+    stale = [path for mtime, _, path in files if mtime < cutoff]
+    
+    if max_bytes is not None:
+        total_bytes = 0
+        for mtime, size, path in sorted(files, reverse=True):  # newest first
+            total_bytes += size
+            if mtime >= cutoff and total_bytes > max_bytes:
+                stale.append(path)
+    
+    for path in stale:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+def _mark_completed(task: TaskStatus, result_file: str, stat_result: os.stat_result):
+    """Record a finished result on its task"""
+    task.status = "completed"
+    task.progress = 100
+    task.result_file = result_file
+    task.result_filename = os.path.basename(result_file)
+    task.result_size = stat_result.st_size
+    task.result_mtime = stat_result.st_mtime
+    task.media_type = _get_media_type(result_file)
+    task.message = "Processing completed successfully"
+
+@lru_cache(maxsize=SMALL_RESULT_CACHE_ENTRIES)
+def _load_small_result(file_path: str, mtime: float) -> bytes:
+    """Read a small result file; the mtime is part of the cache key so rewritten files are reloaded"""
+    with open(file_path, 'rb') as f:
+        return f.read()
+
+# Media types of result files, keyed on file suffix
+MEDIA_TYPES = {
+    '.csv': 'text/csv',
+    '.json': 'application/json',
+    '.parquet': 'application/octet-stream',
+}
+
+async def process_pdf_job(
+    ctx: dict,
+    task_id: str,
+    pdf_path: str,
+    result_path: str,
+    output_format: str,
+    extraction_method: str,
+    include_metadata: bool,
+    text_only: bool,
+    cache_file: Optional[str] = None,
+    source_name: Optional[str] = None
+):
+    """Task queue entry point for process_pdf"""
+    await process_pdf(
+        task_id,
+        Path(pdf_path),
+        Path(result_path),
+        output_format,
+        extraction_method,
+        include_metadata,
+        text_only,
+        Path(cache_file) if cache_file else None,
+        source_name
+    )
+
 def _get_media_type(file_path: str) -> str:
     """Determine the media type based on file extension"""
-    if file_path.endswith('.csv'):
-        return 'text/csv'
-    elif file_path.endswith('.json'):
-        return 'application/json'
-    elif file_path.endswith('.parquet'):
-        return 'application/octet-stream'
-    else:
-        return 'text/plain'
+    return MEDIA_TYPES.get(Path(file_path).suffix.lower(), 'text/plain')
+
+async def open_resources(page_workers: int):
+    """Create the Redis connection and page extraction pool used by process_pdf"""
+    app.state.redis = aioredis.from_url(REDIS_URL, decode_responses=True) if REDIS_URL else None
+    if app.state.redis is not None:
+        app.state.update_task_script = app.state.redis.register_script(UPDATE_TASK_SCRIPT)
+    
+    app.state.page_workers = page_workers
+    app.state.page_executor = _new_page_executor(page_workers)
+
+def _new_page_executor(page_workers: int) -> ProcessPoolExecutor:
+    """Create the process pool that extracts page ranges of large PDFs"""
+    # Spawn rather than fork: the process is multi-threaded by now
+    return ProcessPoolExecutor(
+        max_workers=page_workers,
+        mp_context=multiprocessing.get_context("spawn")
+    )
+
+def _replace_page_executor(broken: Optional[Executor]):
+    """Swap in a new page pool for one whose worker died, unless another task already did"""
+    if broken is None or app.state.page_executor is not broken:
+        return
+    
+    logger.warning("Page extraction pool is broken; starting a new one")
+    app.state.page_executor = _new_page_executor(app.state.page_workers)
+    broken.shutdown(wait=False, cancel_futures=True)
+
+async def close_resources():
+    """Release the resources created by open_resources"""
+    app.state.page_executor.shutdown(wait=False, cancel_futures=True)
+    if app.state.redis is not None:
+        await app.state.redis.aclose()
 
 # Cleanup task to remove old tasks and files
 @app.on_event("startup")
 async def startup_event():
-    """Clean up old files on startup"""
-    try:
-        # Clear old files from upload and results directories
-        for file_path in UPLOAD_DIR.glob('*'):
-            if file_path.is_file() and (time.time() - file_path.stat().st_mtime) > 3600:  # 1 hour
-                file_path.unlink()
-                
-        for file_path in RESULTS_DIR.glob('*'):
-            if file_path.is_file() and (time.time() - file_path.stat().st_mtime) > 3600:  # 1 hour
-                file_path.unlink()
-                
-        logger.info("Cleaned up old files during startup")
-    except Exception as e:
-        logger.error(f"Error during startup cleanup: {str(e)}")
+    """Create shared resources and start the periodic file cleanup"""
+    await open_resources(page_workers=max(1, (os.cpu_count() or 1) // WEB_WORKERS))
+    app.state.arq = await create_pool(RedisSettings.from_dsn(REDIS_URL)) if USE_TASK_QUEUE else None
+    
+    app.state.sweep_task = asyncio.create_task(sweep_stale_files())
+
+async def sweep_stale_files():
+    """Clean up old files on startup and then periodically, keeping the result cache bounded"""
+    while True:
+        try:
+            # Clear files older than an hour from the upload, results and cache directories
+            await asyncio.gather(
+                asyncio.to_thread(_remove_stale_files, UPLOAD_DIR, FILE_MAX_AGE_SECONDS),
+                asyncio.to_thread(_remove_stale_files, RESULTS_DIR, FILE_MAX_AGE_SECONDS),
+                asyncio.to_thread(_remove_stale_files, CACHE_DIR, FILE_MAX_AGE_SECONDS, CACHE_MAX_BYTES),
+            )
+            logger.debug("Cleaned up old files")
+        except Exception as e:
+            logger.error(f"Error during file cleanup: {str(e)}")
+        
+        await asyncio.sleep(SWEEP_INTERVAL_SECONDS)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release shared resources"""
+    app.state.sweep_task.cancel()
+    await close_resources()
+    if app.state.arq is not None:
+        await app.state.arq.aclose()
+
+async def _worker_startup(ctx: dict):
+    """Task queue worker startup hook"""
+    await open_resources(page_workers=os.cpu_count() or 1)
+
+async def _worker_shutdown(ctx: dict):
+    """Task queue worker shutdown hook"""
+    await close_resources()
+
+class WorkerSettings:
+    """arq worker settings: run `python -m arq api.app.WorkerSettings` from the project root"""
+    functions = [process_pdf_job]
+    redis_settings = RedisSettings.from_dsn(REDIS_URL) if REDIS_URL else RedisSettings()
+    on_startup = _worker_startup
+    on_shutdown = _worker_shutdown
+    allow_abort_jobs = True
+    max_jobs = 2  # each job already spreads its pages over all cores
+    job_timeout = 3600
 
 # Run the application when executed directly
 if __name__ == "__main__":
-    uvicorn.run("app:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    uvicorn.run(
+        "app:app",
+        host="0.0.0.0",
+        port=8000,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        workers=WEB_WORKERS,
+    )
\ No newline at end of file
@@ -3,19 +3,28 @@ import sys
 import time
 import logging
 import argparse
+import threading
+import queue
 import traceback
-from typing import List, Dict, Any, Optional, Union, Tuple
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional, Union, Tuple, Iterable, Iterator, Callable, TypedDict, TypeVar
+from collections import OrderedDict
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
 import tempfile
 import shutil
 import re
+import fnmatch
+import csv
+import orjson
 import PyPDF2
-import pandas as pd
 import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pyarrow.csv as pcsv
 from tqdm import tqdm
-import chardet
 import fitz  # PyMuPDF - alternative PDF reader for better text extraction
+import pypdfium2 as pdfium  # PDFium - fast C++ fallback reader
 
 # Configure logging
 logging.basicConfig(
@@ -28,6 +37,100 @@ logging.basicConfig(
 )
 logger = logging.getLogger("pdf_processor")
 
+# Minimum page count before a single PDF is split across the page executor
+PARALLEL_PAGE_THRESHOLD = 16
+
+# Number of pages extracted ahead of the output writer
+PREFETCH_PAGES = 8
+
+# Maximum number of open PyMuPDF documents kept for re-processing unchanged files
+DOCUMENT_CACHE_SIZE = 32
+
+# PyMuPDF text extraction flags: plain text without image blocks, with
+# ligatures expanded to their component characters
+_TEXT_FLAGS = fitz.TEXTFLAGS_TEXT & ~fitz.TEXT_PRESERVE_IMAGES & ~fitz.TEXT_PRESERVE_LIGATURES
+
+# Metadata fields saved with the text, and the document info keys each engine stores them under
+_METADATA_FIELDS = ('title', 'author', 'creator', 'producer', 'subject', 'creation_date', 'modification_date')
+_PYMUPDF_INFO_KEYS = ('title', 'author', 'creator', 'producer', 'subject', 'creationDate', 'modDate')
+_PDFIUM_INFO_KEYS = ('Title', 'Author', 'Creator', 'Producer', 'Subject', 'CreationDate', 'ModDate')
+_PYPDF_INFO_KEYS = ('/Title', '/Author', '/Creator', '/Producer', '/Subject', '/CreationDate', '/ModDate')
+
+# Runs of whitespace within a line (everything but newlines), collapsed page-wide
+_WS_INLINE_RE = re.compile(r'[^\S\n]+')
+
+# Non-printable control characters, removed with a single str.translate pass. Most text has
+# none, so _clean_lines checks with _CTRL_ANY first and usually skips the translate copy.
+_CTRL_TABLE = dict.fromkeys([*range(0x00, 0x09), 0x0B, 0x0C, *range(0x0E, 0x20), 0x7F])
+_CTRL_ANY = re.compile(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]')
+
+
+class PageData(TypedDict, total=False):
+    """One extracted page: its cleaned lines and raw text size, or the error that stopped extraction."""
+    page: int
+    content: List[str]
+    page_size: int
+    error: str
+
+
+class _PageExtractionError(Exception):
+    """An error raised while pages were extracted lazily, as opposed to while they were written."""
+
+
+class _DocumentCache:
+    """
+    Bounded LRU of open PyMuPDF documents keyed on (path, mtime, size), so processing an
+    unchanged file again skips re-parsing it. A document is checked out of the cache
+    while in use, since it must not be read from two threads at once; evicted documents
+    are closed.
+    """
+    
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._docs: "OrderedDict[Tuple[str, int, int], fitz.Document]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def acquire(self, pdf_path: Union[str, Path]) -> Tuple[Tuple[str, int, int], "fitz.Document"]:
+        """Check out a cached document for `pdf_path`, opening it if there is none."""
+        stat = os.stat(pdf_path)
+        key = (os.path.abspath(pdf_path), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            doc = self._docs.pop(key, None)
+        if doc is None:
+            doc = fitz.open(str(pdf_path))
+        return key, doc
+    
+    def release(self, key: Tuple[str, int, int], doc: "fitz.Document") -> None:
+        """Return a checked-out document, closing whatever no longer fits in the cache."""
+        evicted: List["fitz.Document"] = []
+        with self._lock:
+            # Older versions of the same file can never be hit again
+            evicted.extend(self._docs.pop(k) for k in [k for k in self._docs if k[0] == key[0]])
+            if self.maxsize > 0:
+                self._docs[key] = doc
+                while len(self._docs) > self.maxsize:
+                    evicted.append(self._docs.popitem(last=False)[1])
+            else:
+                evicted.append(doc)
+        for evicted_doc in evicted:
+            evicted_doc.close()
+    
+    def evict(self, pdf_path: Union[str, Path]) -> None:
+        """Close and forget any cached document for `pdf_path`."""
+        path = os.path.abspath(pdf_path)
+        with self._lock:
+            evicted = [self._docs.pop(k) for k in [k for k in self._docs if k[0] == path]]
+        for evicted_doc in evicted:
+            evicted_doc.close()
+
+
+_document_cache = _DocumentCache(DOCUMENT_CACHE_SIZE)
+
+
+def evict_cached_document(pdf_path: Union[str, Path]) -> None:
+    """Close the cached document for a file about to be deleted or replaced, releasing its handle."""
+    _document_cache.evict(pdf_path)
+
 
 class PDFProcessor:
     """Production-ready PDF processing class with robust error handling and optimization."""
@@ -36,9 +139,10 @@ class PDFProcessor:
                  output_format: str = 'csv', 
                  chunk_size: int = 1000, 
                  max_workers: int = 4,
-                 extraction_method: str = 'auto',
+                 extraction_method: str = 'pymupdf',
                  include_metadata: bool = True,
-                 text_only: bool = False):  # Add this parameter
+                 text_only: bool = False,  # Add this parameter
+                 page_executor: Optional[Executor] = None):
         """
         Initialize the PDF processor with configuration options.
         
@@ -46,9 +150,10 @@ class PDFProcessor:
             output_format: Format to save results ('csv', 'json', 'parquet')
             chunk_size: Maximum lines to process in memory at once
             max_workers: Maximum number of parallel workers for multi-file processing
-            extraction_method: Text extraction method ('pypdf', 'pymupdf', 'auto')
+            extraction_method: Text extraction method ('pypdf', 'pymupdf', 'pdfium', 'auto')
             include_metadata: Whether to include PDF metadata in output
             text_only: Whether to output only the text column
+            page_executor: Optional process pool used to extract page ranges of large PDFs in parallel
         """
         self.output_format = output_format.lower()
         self.chunk_size = chunk_size
@@ -56,24 +161,50 @@ class PDFProcessor:
         self.extraction_method = extraction_method
         self.include_metadata = include_metadata
         self.text_only = text_only  # Store the new parameter
+        self.page_executor = page_executor
+        self.page_executor_broken = False  # set when a page worker died; the owner should replace the pool
+        self.extraction_error: Optional[str] = None  # error of the last process_file extraction, if any
+        self.failed_pages = 0  # pages of the last process_file that could not be extracted
+        self._executor: Optional[ProcessPoolExecutor] = None  # created on first directory run
         
         logger.info(f"Initialized PDFProcessor with: output_format={output_format}, "
                     f"chunk_size={chunk_size}, max_workers={max_workers}, "
                     f"extraction_method={extraction_method}, text_only={text_only}")
+    
+    def __enter__(self) -> "PDFProcessor":
+        return self
+    
+    def __exit__(self, exc_type: Any, exc_value: Any, tb: Any) -> None:
+        self.close()
+    
+    def close(self) -> None:
+        """Shut down the worker pool used by `process_directory`, if one was started."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
         
-    def process_file(self, pdf_file: Union[str, Path], output_file: Optional[str] = None) -> str:
+    def process_file(self, pdf_file: Union[str, Path], output_file: Optional[Union[str, Path]] = None,
+                     progress_callback: Optional[Callable[[int, int], None]] = None,
+                     source_name: Optional[str] = None) -> str:
         """
         Process a single PDF file and save the extracted text to the specified output file.
         
+        Pages are extracted lazily on a background thread, a few pages ahead of the
+        output writer, so extraction overlaps with writing.
+        
         Args:
             pdf_file: Path to the PDF file to process
             output_file: Path to the output file (if None, auto-generated)
+            progress_callback: Optional callable receiving (pages_done, total_pages) after each page
+            source_name: Name recorded in the output's filename field (default: the PDF's file name)
             
         Returns:
             Path to the created output file
         """
         start_time = time.time()
         pdf_path = Path(pdf_file)
+        self.extraction_error = None
+        self.failed_pages = 0
         
         # Validate input file
         if not self._validate_input_file(pdf_path):
@@ -87,10 +218,16 @@ class PDFProcessor:
             logger.info(f"Processing PDF: {pdf_file}")
             
             # Extract text from PDF
-            text_data = self._extract_text_from_pdf(pdf_path)
+            text_data = self._extract_text_from_pdf(pdf_path, progress_callback)
             
             # Save extracted text
-            saved_path = self._save_text_data(text_data, output_file)
+            try:
+                saved_path = self._save_extracted(text_data, output_file, source_name)
+            except _PageExtractionError as e:
+                # Pages are extracted as they are written, so extraction errors surface here;
+                # the partial output is overwritten with what the failed extraction yields
+                text_data = self._extraction_failed(pdf_path, e.__cause__ or e)
+                saved_path = self._save_extracted(text_data, output_file, source_name)
             
             processing_time = time.time() - start_time
             logger.info(f"Successfully processed {pdf_file} in {processing_time:.2f} seconds. "
@@ -103,6 +240,27 @@ class PDFProcessor:
             logger.debug(traceback.format_exc())
             return ""
     
+    def _save_extracted(self, text_data: Dict[str, Any], output_file: Union[str, Path],
+                        source_name: Optional[str]) -> str:
+        """
+        Save the result of `_extract_text_from_pdf`, extracting its pages ahead of the writer
+        and recording its extraction error and failed pages on the processor.
+        """
+        self.extraction_error = text_data.get('error')
+        self.failed_pages = 0
+        if source_name is not None:
+            text_data['filename'] = source_name
+        pages = _guard_extraction(text_data.get('text', []))
+        text_data['text'] = _prefetch(self._count_failed_pages(pages), PREFETCH_PAGES)
+        return self._save_text_data(text_data, output_file)
+    
+    def _count_failed_pages(self, pages: Iterable[PageData]) -> Iterator[PageData]:
+        """Pass pages through, counting those that carry an extraction error."""
+        for page in pages:
+            if 'error' in page:
+                self.failed_pages += 1
+            yield page
+    
     def process_directory(self, input_dir: Union[str, Path], output_dir: Optional[Union[str, Path]] = None, 
                          pattern: str = "*.pdf") -> List[str]:
         """
@@ -130,96 +288,157 @@ class PDFProcessor:
             output_path.mkdir(exist_ok=True, parents=True)
         
         # Find all PDF files
-        pdf_files = list(input_path.glob(pattern))
+        pdf_files = _find_files(input_path, pattern)
         if not pdf_files:
             logger.warning(f"No PDF files found in {input_dir} matching pattern '{pattern}'")
             return []
         
         logger.info(f"Found {len(pdf_files)} PDF files to process")
-        results = []
-        
-        # Process files in parallel
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            # Submit all tasks and track with progress bar
-            future_to_file = {
-                executor.submit(self.process_file, 
-                               pdf_file, 
-                               output_path / f"{pdf_file.stem}.{self.output_format}"): pdf_file
-                for pdf_file in pdf_files
-            }
-            
-            # Show progress with tqdm
-            with tqdm(total=len(pdf_files), desc="Processing PDFs") as pbar:
-                for future in as_completed(future_to_file):
-                    pdf_file = future_to_file[future]
-                    try:
-                        output_file = future.result()
-                        if output_file:
-                            results.append(output_file)
-                        pbar.update(1)
-                    except Exception as e:
-                        logger.error(f"Error processing {pdf_file}: {str(e)}")
+        results: List[str] = []
+        
+        # Process files in batches (about four per worker) so each task amortizes its pickling/IPC cost
+        config = self._worker_config()
+        jobs = [(pdf_file, output_path / f"{pdf_file.stem}.{self.output_format}") for pdf_file in pdf_files]
+        batch_size = max(1, len(jobs) // (self.max_workers * 4))
+        batches = [jobs[start:start + batch_size] for start in range(0, len(jobs), batch_size)]
+        
+        # Show progress with tqdm
+        with tqdm(total=len(pdf_files), desc="Processing PDFs") as pbar:
+            lost = self._run_batches(batches, config, results, pbar)
+            if lost:
+                # Retry once on a new pool; batches that break that one too are given up on
+                for batch in self._run_batches(lost, config, results, pbar):
+                    logger.error(f"Error processing batch of {len(batch)} files starting at "
+                                 f"{batch[0][0]}: a worker process died")
         
         logger.info(f"Completed processing {len(results)} files successfully out of {len(pdf_files)} total files")
         return results
         
+    def _run_batches(self, batches: List[List[Tuple[Path, Path]]], config: Dict[str, Any],
+                     results: List[str], pbar: tqdm) -> List[List[Tuple[Path, Path]]]:
+        """
+        Process `batches` on the worker pool, adding their output paths to `results`.
+        
+        Extraction is CPU-bound, so it runs in processes rather than threads. The pool is kept
+        across calls and shut down by close(); if it breaks (a worker process died), it is
+        discarded so the next call starts a new one.
+        
+        Returns:
+            The batches lost to a broken pool
+        """
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        
+        future_to_batch = {}
+        lost: List[List[Tuple[Path, Path]]] = []
+        for i, batch in enumerate(batches):
+            try:
+                future_to_batch[self._executor.submit(_process_files_worker, batch, config)] = batch
+            except BrokenProcessPool:
+                lost.extend(batches[i:])
+                break
+        
+        for future in as_completed(future_to_batch):
+            batch = future_to_batch[future]
+            try:
+                results.extend(output_file for output_file in future.result() if output_file)
+                pbar.update(len(batch))
+            except BrokenProcessPool:
+                lost.append(batch)
+            except Exception as e:
+                logger.error(f"Error processing batch of {len(batch)} files starting at "
+                             f"{batch[0][0]}: {str(e)}")
+        
+        if lost:
+            logger.warning(f"Worker pool is broken; {len(lost)} batches were not processed")
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        return lost
+        
+    def _worker_config(self) -> Dict[str, Any]:
+        """Picklable settings for recreating this processor in a worker process."""
+        return {
+            'output_format': self.output_format,
+            'chunk_size': self.chunk_size,
+            'max_workers': self.max_workers,
+            'extraction_method': self.extraction_method,
+            'include_metadata': self.include_metadata,
+            'text_only': self.text_only,
+        }
+        
     def _validate_input_file(self, file_path: Path) -> bool:
-        """Validate that the input file exists and is a valid PDF."""
+        """
+        Validate that the input file exists and is a valid PDF.
+        
+        The file is opened once at the OS level; its size and header are both
+        read from that descriptor.
+        """
         # Check if file exists
-        if not file_path.exists():
+        try:
+            fd = os.open(file_path, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+        except FileNotFoundError:
             logger.error(f"File does not exist: {file_path}")
             return False
-        
-        # Check file extension
-        if file_path.suffix.lower() != '.pdf':
-            logger.error(f"File is not a PDF: {file_path}")
+        except OSError as e:
+            logger.error(f"Error validating file {file_path}: {str(e)}")
             return False
         
-        # Check file size
-        file_size_mb = file_path.stat().st_size / (1024 * 1024)
-        if file_size_mb > 500:  # Warning for very large files
-            logger.warning(f"Large PDF detected ({file_size_mb:.2f} MB): {file_path}. Processing may take time.")
-        
-        # Basic PDF validation
         try:
-            with open(file_path, 'rb') as f:
-                header = f.read(5)
-                if header != b'%PDF-':
-                    logger.error(f"File is not a valid PDF (invalid header): {file_path}")
-                    return False
+            # Check file extension
+            if file_path.suffix.lower() != '.pdf':
+                logger.error(f"File is not a PDF: {file_path}")
+                return False
+            
+            # Check file size
+            file_size_mb = os.fstat(fd).st_size / (1024 * 1024)
+            if file_size_mb > 500:  # Warning for very large files
+                logger.warning(f"Large PDF detected ({file_size_mb:.2f} MB): {file_path}. Processing may take time.")
+            
+            # Basic PDF validation
+            if os.read(fd, 5) != b'%PDF-':
+                logger.error(f"File is not a valid PDF (invalid header): {file_path}")
+                return False
         except Exception as e:
             logger.error(f"Error validating file {file_path}: {str(e)}")
             return False
+        finally:
+            os.close(fd)
             
         return True
             
-    def _extract_text_from_pdf(self, pdf_path: Path) -> Dict[str, Any]:
+    def _extract_text_from_pdf(self, pdf_path: Path,
+                               progress_callback: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
         """
         Extract text and metadata from a PDF file using the specified method.
         
         Args:
             pdf_path: Path to PDF file
+            progress_callback: Optional callable receiving (pages_done, total_pages) after each page
             
         Returns:
-            Dictionary with extracted text and metadata
+            Dictionary with extracted text and metadata; 'text' is an iterator of pages,
+            extracted as it is consumed
         """
         method = self.extraction_method.lower()
         
         try:
-            # First, try to extract metadata regardless of method
-            metadata = self._extract_metadata(pdf_path) if self.include_metadata else {}
-            
+            # Each extractor also returns the metadata, read from the same open document
             if method == 'auto':
-                # Try PyMuPDF first, fallback to PyPDF2
+                # Use PyMuPDF, falling back to PDFium only for files MuPDF cannot parse
                 try:
-                    text_lines = self._extract_with_pymupdf(pdf_path)
-                except Exception as e:
-                    logger.warning(f"PyMuPDF extraction failed, falling back to PyPDF2: {str(e)}")
-                    text_lines = self._extract_with_pypdf(pdf_path)
-            elif method == 'pymupdf':
-                text_lines = self._extract_with_pymupdf(pdf_path)
-            else:  # default to pypdf
-                text_lines = self._extract_with_pypdf(pdf_path)
+                    total_pages, text_lines, metadata = self._extract_with_pymupdf(pdf_path)
+                except fitz.FileDataError as e:
+                    logger.warning(f"PyMuPDF could not parse the file, falling back to PDFium: {str(e)}")
+                    total_pages, text_lines, metadata = self._extract_with_pdfium(pdf_path)
+            elif method == 'pdfium':
+                total_pages, text_lines, metadata = self._extract_with_pdfium(pdf_path)
+            elif method == 'pypdf':  # opt-in only, much slower than the C-based engines
+                total_pages, text_lines, metadata = self._extract_with_pypdf(pdf_path)
+            else:  # default to pymupdf
+                total_pages, text_lines, metadata = self._extract_with_pymupdf(pdf_path)
+            
+            if progress_callback is not None:
+                text_lines = _report_progress(text_lines, total_pages, progress_callback)
                 
             # Create result with page separation
             return {
@@ -230,97 +449,122 @@ class PDFProcessor:
                 'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
             }
                 
-        except MemoryError:
+        except Exception as e:
+            return self._extraction_failed(pdf_path, e)
+    
+    def _extraction_failed(self, pdf_path: Path, error: BaseException) -> Dict[str, Any]:
+        """
+        Result for an extraction of `pdf_path` that raised `error`: memory errors are retried
+        in chunks, anything else gives an empty result carrying the error.
+        """
+        if isinstance(error, MemoryError):
             logger.error(f"Memory error while processing {pdf_path}. File may be too large.")
             # Try to process in smaller chunks if it's a memory error
             return self._extract_text_in_chunks(pdf_path)
-        except Exception as e:
-            logger.error(f"Error extracting text from {pdf_path}: {str(e)}")
-            logger.debug(traceback.format_exc())
-            return {'text': [], 'metadata': {}, 'error': str(e)}
+        
+        logger.error(f"Error extracting text from {pdf_path}: {str(error)}")
+        logger.debug(traceback.format_exc())
+        return {'text': [], 'metadata': {}, 'error': str(error)}
     
-    def _extract_with_pypdf(self, pdf_path: Path) -> List[Dict[str, Any]]:
-        """Extract text using PyPDF2."""
+    def _extract_with_pypdf(self, pdf_path: Path) -> Tuple[int, Iterator[PageData], Dict[str, str]]:
+        """
+        Extract text using PyPDF2.
+        Returns the page count, a lazy iterator of pages and the document metadata.
+        """
         try:
             pdf_reader = PyPDF2.PdfReader(str(pdf_path))
             total_pages = len(pdf_reader.pages)
-            text_lines = []
+            metadata = _pypdf_metadata(pdf_reader) if self.include_metadata else {}
             
-            # Extract text from each page with progress reporting for large documents
-            for page_num in tqdm(range(total_pages), desc="Extracting pages", disable=total_pages < 10):
-                try:
-                    page = pdf_reader.pages[page_num]
-                    text = page.extract_text() or ""
-                    
-                    # Clean and split the text
-                    lines = text.split('\n')
-                    clean_lines = []
-                    for line in lines:
-                        line = self._clean_text(line)
-                        if line:
-                            clean_lines.append(line)
-                    
-                    # Store page info with the text
-                    text_lines.append({
-                        'page': page_num + 1,
-                        'content': clean_lines,
-                        'page_size': len(text)
-                    })
-                    
-                except Exception as e:
-                    logger.warning(f"Error extracting text from page {page_num}: {str(e)}")
-                    text_lines.append({
-                        'page': page_num + 1,
-                        'content': [],
-                        'error': str(e)
-                    })
-            
-            return text_lines
+            return total_pages, _extract_pypdf_pages(pdf_reader, range(total_pages)), metadata
         except Exception as e:
             logger.error(f"PyPDF2 extraction error: {str(e)}")
             raise
             
-    def _extract_with_pymupdf(self, pdf_path: Path) -> List[Dict[str, Any]]:
-        """Extract text using PyMuPDF (often better quality than PyPDF2)."""
+    def _extract_with_pymupdf(self, pdf_path: Path) -> Tuple[int, Iterator[PageData], Dict[str, str]]:
+        """
+        Extract text using PyMuPDF (often better quality than PyPDF2).
+        Returns the page count, a lazy iterator of pages and the document metadata,
+        all from a single open of the file.
+        """
         try:
-            doc = fitz.open(str(pdf_path))
-            total_pages = len(doc)
-            text_lines = []
+            key, doc = _document_cache.acquire(pdf_path)
+            try:
+                total_pages = len(doc)
+                metadata = _pymupdf_metadata(doc) if self.include_metadata else {}
+            except Exception:
+                _document_cache.release(key, doc)
+                raise
             
-            for page_num in tqdm(range(total_pages), desc="Extracting pages", disable=total_pages < 10):
-                try:
-                    page = doc[page_num]
-                    text = page.get_text() or ""
-                    
-                    # Clean and split the text
-                    lines = text.split('\n')
-                    clean_lines = []
-                    for line in lines:
-                        line = self._clean_text(line)
-                        if line:
-                            clean_lines.append(line)
-                    
-                    # Store page info with the text
-                    text_lines.append({
-                        'page': page_num + 1,
-                        'content': clean_lines,
-                        'page_size': len(text)
-                    })
-                    
-                except Exception as e:
-                    logger.warning(f"Error extracting text from page {page_num}: {str(e)}")
-                    text_lines.append({
-                        'page': page_num + 1,
-                        'content': [],
-                        'error': str(e)
-                    })
-            
-            doc.close()
-            return text_lines
+            # Large documents are split into page ranges and extracted in parallel
+            if (self.page_executor is not None and not self.page_executor_broken
+                    and total_pages >= PARALLEL_PAGE_THRESHOLD):
+                _document_cache.release(key, doc)
+                pages = self._extract_pages_in_parallel(self.page_executor, pdf_path, total_pages)
+                return total_pages, pages, metadata
+            
+            return total_pages, _release_when_done(_extract_pymupdf_pages(doc), key, doc), metadata
         except Exception as e:
             logger.error(f"PyMuPDF extraction error: {str(e)}")
             raise
     
+    def _extract_pages_in_parallel(self, executor: Executor, pdf_path: Path,
+                                   total_pages: int) -> Iterator[PageData]:
+        """
+        Extract page ranges of a single PDF on the page executor, preserving page order.
+        
+        If the executor is broken (a worker process died), the affected ranges are
+        extracted in this thread instead and `page_executor_broken` is set.
+        """
+        num_ranges = min(total_pages, os.cpu_count() or 1)
+        range_size = -(-total_pages // num_ranges)  # ceiling division
+        ranges = [(start, min(start + range_size, total_pages)) for start in range(0, total_pages, range_size)]
+        
+        futures: List[Optional[Future]] = []
+        for start, end in ranges:
+            try:
+                futures.append(executor.submit(_extract_page_range, str(pdf_path), start, end))
+            except BrokenProcessPool:
+                self._mark_page_executor_broken()
+                futures.append(None)
+        logger.debug(f"Extracting {total_pages} pages of {pdf_path} in {len(futures)} ranges")
+        
+        return self._collect_page_ranges(pdf_path, ranges, futures)
+    
+    def _collect_page_ranges(self, pdf_path: Path, ranges: List[Tuple[int, int]],
+                             futures: List[Optional[Future]]) -> Iterator[PageData]:
+        """Yield the pages of each range in order, extracting ranges the executor lost in this thread."""
+        for (start, end), future in zip(ranges, futures):
+            pages: Optional[List[PageData]] = None
+            if future is not None:
+                try:
+                    pages = future.result()
+                except BrokenProcessPool:
+                    self._mark_page_executor_broken()
+            if pages is None:
+                pages = _extract_page_range(str(pdf_path), start, end)
+            yield from pages
+    
+    def _mark_page_executor_broken(self) -> None:
+        if not self.page_executor_broken:
+            logger.warning("Page executor is broken; extracting the remaining pages in-process")
+            self.page_executor_broken = True
+    
+    def _extract_with_pdfium(self, pdf_path: Path) -> Tuple[int, Iterator[PageData], Dict[str, str]]:
+        """
+        Extract text using pypdfium2 (C++ PDFium core, much faster than PyPDF2).
+        Returns the page count, a lazy iterator of pages and the document metadata.
+        """
+        try:
+            pdf = pdfium.PdfDocument(str(pdf_path))
+            total_pages = len(pdf)
+            metadata = _pdfium_metadata(pdf) if self.include_metadata else {}
+            
+            return total_pages, _close_when_done(_extract_pdfium_pages(pdf, range(total_pages)), pdf), metadata
+        except Exception as e:
+            logger.error(f"PDFium extraction error: {str(e)}")
+            raise
+    
     def _extract_text_in_chunks(self, pdf_path: Path) -> Dict[str, Any]:
         """
         Extract text from a large PDF in chunks to avoid memory issues.
@@ -335,44 +579,18 @@ class PDFProcessor:
                 doc = fitz.open(str(pdf_path))
                 total_pages = len(doc)
                 chunk_size = min(20, max(1, total_pages // 10))  # Calculate chunk size
-                text_lines = []
+                text_lines: List[PageData] = []
                 
                 for start_page in range(0, total_pages, chunk_size):
                     end_page = min(start_page + chunk_size - 1, total_pages - 1)
                     logger.debug(f"Processing pages {start_page} to {end_page}")
                     
                     # Extract text from page range
-                    chunk_text = []
-                    for page_num in range(start_page, end_page + 1):
-                        try:
-                            page = doc[page_num]
-                            text = page.get_text() or ""
-                            lines = text.split('\n')
-                            clean_lines = []
-                            for line in lines:
-                                line = self._clean_text(line)
-                                if line:
-                                    clean_lines.append(line)
-                            
-                            chunk_text.append({
-                                'page': page_num + 1,
-                                'content': clean_lines,
-                                'page_size': len(text)
-                            })
-                            
-                        except Exception as e:
-                            logger.warning(f"Error in chunk processing, page {page_num}: {str(e)}")
-                            chunk_text.append({
-                                'page': page_num + 1,
-                                'content': [],
-                                'error': str(e)
-                            })
-                    
-                    text_lines.extend(chunk_text)
+                    text_lines.extend(_extract_pymupdf_pages(doc.pages(start_page, end_page + 1)))
                     
+                metadata = _pymupdf_metadata(doc) if self.include_metadata else {}
                 doc.close()
                 
-                metadata = self._extract_metadata(pdf_path) if self.include_metadata else {}
                 return {
                     'text': text_lines,
                     'metadata': metadata,
@@ -391,58 +609,13 @@ class PDFProcessor:
                     'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
                 }
     
-    def _extract_metadata(self, pdf_path: Path) -> Dict:
-        """Extract metadata from PDF."""
-        try:
-            with open(pdf_path, 'rb') as file:
-                reader = PyPDF2.PdfReader(file)
-                info = reader.metadata
-                if info:
-                    # Convert to regular dictionary and handle XMP metadata
-                    metadata = {
-                        'title': info.get('/Title', ''),
-                        'author': info.get('/Author', ''),
-                        'creator': info.get('/Creator', ''),
-                        'producer': info.get('/Producer', ''),
-                        'subject': info.get('/Subject', ''),
-                        'creation_date': info.get('/CreationDate', ''),
-                        'modification_date': info.get('/ModDate', ''),
-                        'pages': len(reader.pages)
-                    }
-                    return {k: str(v) for k, v in metadata.items()}
-                return {'pages': len(reader.pages)}
-        except Exception as e:
-            logger.warning(f"Failed to extract metadata: {str(e)}")
-            return {}
-    
-    def _clean_text(self, text: str) -> str:
-        """
-        Clean extracted text by removing excess whitespace and invalid characters.
-        
-        Args:
-            text: Text string to clean
-            
-        Returns:
-            Cleaned text
-        """
-        if not text:
-            return ""
-            
-        # Replace multiple spaces with a single space
-        text = re.sub(r'\s+', ' ', text)
-        
-        # Remove non-printable characters
-        text = re.sub(r'[\x00-\x08\x0B\x0C\x0E-\x1F\x7F]', '', text)
-        
-        # Trim whitespace
-        text = text.strip()
-        
-        return text
-                
-    def _save_text_data(self, text_data: Dict[str, Any], output_file: str) -> str:
+    def _save_text_data(self, text_data: Dict[str, Any], output_file: Union[str, Path]) -> str:
         """
         Save extracted text data to the specified output format.
         
+        CSV and Parquet rows are written as pages are extracted; JSON output
+        needs every page in memory before writing.
+        
         Args:
             text_data: Dictionary containing extracted text and metadata
             output_file: Path to output file
@@ -452,51 +625,42 @@ class PDFProcessor:
         """
         try:
             output_path = Path(output_file)
+            pages = text_data.get('text', [])
             
             # Handle text-only mode
             if self.text_only:
-                # Extract just the text lines from all pages
-                text_only_data = []
+                if self.output_format == 'json':
+                    # For JSON, save as a simple array of text strings
+                    texts = [line for page_data in pages for line in page_data.get('content', [])]
+                    if not texts:
+                        logger.warning("No text content extracted to save")
+                        texts.append("")
+                    
+                    with open(output_path, 'wb') as f:
+                        f.write(orjson.dumps(texts, option=orjson.OPT_INDENT_2))
+                    
+                    logger.info(f"Saved {len(texts)} text-only entries to {output_path}")
+                    return str(output_path)
                 
-                for page_data in text_data.get('text', []):
-                    for line in page_data.get('content', []):
-                        if line.strip():  # Skip empty lines
-                            text_only_data.append({"text": line})
+                # Write just the text lines from all pages
+                # (lines are already cleaned and non-empty)
+                saved_path, row_count = self._write_rows(pages, {}, {"text": ""}, output_path,
+                                                         include_page=False)
                 
-                # Handle case with no text
-                if not text_only_data:
-                    logger.warning("No text content extracted to save")
-                    text_only_data.append({"text": ""})
+                logger.info(f"Saved {row_count} text-only entries to {saved_path}")
+                return saved_path
+            
+            if self.output_format == 'json':
+                # For JSON, we can save the original structure
+                text_data = {**text_data, 'text': list(pages)}
+                with open(output_path, 'wb') as f:
+                    f.write(orjson.dumps(text_data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
                 
-                # Save based on format
-                if self.output_format == 'csv':
-                    df = pd.DataFrame(text_only_data)
-                    df.to_csv(output_path, index=False, encoding='utf-8')
-                    
-                elif self.output_format == 'json':
-                    with open(output_path, 'w', encoding='utf-8') as f:
-                        # For JSON, save as a simple array of text strings
-                        import json
-                        json.dump([item["text"] for item in text_only_data], f, ensure_ascii=False, indent=2)
-                        
-                elif self.output_format == 'parquet':
-                    df = pd.DataFrame(text_only_data)
-                    df.to_parquet(output_path, index=False)
-                    
-                else:
-                    # Default to CSV if format not recognized
-                    df = pd.DataFrame(text_only_data)
-                    csv_path = output_path.with_suffix('.csv')
-                    df.to_csv(csv_path, index=False, encoding='utf-8')
-                    return str(csv_path)
-                    
-                logger.info(f"Saved {len(text_only_data)} text-only entries to {output_path}")
+                line_count = sum(len(page_data.get('content', [])) for page_data in text_data['text'])
+                logger.info(f"Saved {line_count} text entries to {output_path}")
                 return str(output_path)
             
-            # Original code for regular output
             # Flatten the data structure for tabular formats
-            flattened_data = []
-            
             # Extract common metadata
             common_metadata = {
                 'filename': text_data.get('filename', ''),
@@ -509,55 +673,23 @@ class PDFProcessor:
             for key, value in metadata.items():
                 common_metadata[f'metadata_{key}'] = value
                 
-            # Process each page's text
-            for page_data in text_data.get('text', []):
-                page_num = page_data.get('page', 0)
-                
-                for line in page_data.get('content', []):
-                    row = {
-                        'page': page_num,
-                        'text': line,
-                        **common_metadata
-                    }
-                    flattened_data.append(row)
-            
-            # Handle the case where no text was extracted
-            if not flattened_data:
-                logger.warning("No text content extracted to save")
-                flattened_data.append({
-                    'page': 0,
-                    'text': '',
-                    **common_metadata,
-                    'error': text_data.get('error', 'No text extracted')
-                })
-            
-            # Save to the appropriate format
-            output_path = Path(output_file)
-            
-            if self.output_format == 'csv':
-                df = pd.DataFrame(flattened_data)
-                df.to_csv(output_path, index=False, encoding='utf-8')
-                
-            elif self.output_format == 'json':
-                with open(output_path, 'w', encoding='utf-8') as f:
-                    # For JSON, we can save the original structure
-                    import json
-                    json.dump(text_data, f, ensure_ascii=False, indent=2)
-                    
-            elif self.output_format == 'parquet':
-                df = pd.DataFrame(flattened_data)
-                df.to_parquet(output_path, index=False)
+            # Row saved when no text was extracted
+            empty_row = {
+                'page': 0,
+                'text': '',
+                **common_metadata,
+                'error': text_data.get('error', 'No text extracted')
+            }
             
-            else:
-                # Default to CSV if format not recognized
-                df = pd.DataFrame(flattened_data)
-                csv_path = output_path.with_suffix('.csv')
-                df.to_csv(csv_path, index=False, encoding='utf-8')
-                return str(csv_path)
+            # One row per line of each page's text
+            saved_path, row_count = self._write_rows(pages, common_metadata, empty_row, output_path)
             
-            logger.info(f"Saved {len(flattened_data)} text entries to {output_path}")
-            return str(output_path)
+            logger.info(f"Saved {row_count} text entries to {saved_path}")
+            return saved_path
             
+        except _PageExtractionError:
+            # Not a write error; process_file handles it
+            raise
         except Exception as e:
             logger.error(f"Error saving output to {output_file}: {str(e)}")
             # Try to save to a fallback location
@@ -565,15 +697,437 @@ class PDFProcessor:
             logger.info(f"Attempting to save to fallback file: {fallback_file}")
             
             try:
-                df = pd.DataFrame([{'text': f"Error saving original file: {str(e)}"}])
-                df.to_csv(fallback_file, index=False)
+                _write_csv(fallback_file, [{'text': f"Error saving original file: {str(e)}"}])
                 return fallback_file
             except:
                 logger.critical("Failed to save even to fallback file")
                 return ""
 
+    def _write_rows(self, pages: Iterable[PageData], columns: Dict[str, Any],
+                    empty_row: Dict[str, Any], output_path: Path,
+                    include_page: bool = True) -> Tuple[str, int]:
+        """
+        Write one row per line of `pages` in the configured output format, or only `empty_row`
+        if there are none. Each row holds the page number (if `include_page`), the line text
+        and the constant `columns`.
+        
+        Returns:
+            Path to saved file and number of rows saved
+        """
+        write: Callable[[Path, Iterable["pa.RecordBatch"]], int]
+        if self.output_format == 'parquet':
+            write = _write_parquet
+        else:
+            write = _write_csv_batches
+            # Default to CSV if format not recognized
+            if self.output_format != 'csv':
+                output_path = output_path.with_suffix('.csv')
+        
+        # Both formats are written from columnar batches, without building a dict per line
+        row_count = write(output_path, _page_batches(pages, columns, self.chunk_size, include_page))
+        if not row_count:
+            logger.warning("No text content extracted to save")
+            row_count = write(output_path, [pa.RecordBatch.from_pylist([empty_row])])
+        
+        return str(output_path), row_count
+
+
+def _find_files(directory: Path, pattern: str) -> List[Path]:
+    """
+    List the files in `directory` matching a glob `pattern`.
+    
+    Plain name patterns are matched against a single os.scandir pass, which reuses the
+    directory entries' type information instead of building a Path for every entry;
+    patterns spanning subdirectories go through Path.glob.
+    """
+    if '/' in pattern or os.sep in pattern or '**' in pattern:
+        return [path for path in directory.glob(pattern) if path.is_file()]
+    
+    with os.scandir(directory) as entries:
+        return [Path(entry.path) for entry in entries
+                if fnmatch.fnmatch(entry.name, pattern) and entry.is_file()]
+
+
+def _process_files_worker(jobs: List[Tuple[Path, Path]], config: Dict[str, Any]) -> List[str]:
+    """
+    Process pool worker: process a batch of (pdf_path, output_path) jobs in order,
+    with one processor built from `config`. Failed files yield an empty path.
+    """
+    processor = PDFProcessor(**config)
+    output_files: List[str] = []
+    for pdf_path, output_path in jobs:
+        output_files.append(processor.process_file(pdf_path, output_path))
+        # Each file is processed once, so don't keep its document open in this worker
+        evict_cached_document(pdf_path)
+    return output_files
+
+
+def _clean_lines(text: str) -> List[str]:
+    """
+    Split page text into cleaned, non-empty lines: runs of whitespace collapsed to a single
+    space, non-printable control characters removed and surrounding whitespace trimmed.
+    Done as whole-page passes rather than one call per line.
+    """
+    # Blank pages (covers, image-only scans) skip the passes entirely
+    if not text:
+        return []
+    
+    text = _WS_INLINE_RE.sub(' ', text)
+    if _CTRL_ANY.search(text):
+        text = text.translate(_CTRL_TABLE)
+    return [line for line in map(str.strip, text.split('\n')) if line]
+
+
+def _write_csv(output_path: Union[str, Path], rows: Iterable[Dict[str, Any]]) -> int:
+    """
+    Stream rows sharing the same keys to a CSV file, with a header taken from the first row.
+    Nothing is written if there are no rows.
+    
+    Returns:
+        Number of rows written
+    """
+    rows = iter(rows)
+    first_row = next(rows, None)
+    if first_row is None:
+        return 0
+    
+    row_count = 1
+    with open(output_path, 'w', newline='', encoding='utf-8', buffering=1 << 20) as f:
+        writer = csv.DictWriter(f, fieldnames=list(first_row))
+        writer.writeheader()
+        writer.writerow(first_row)
+        for row in rows:
+            writer.writerow(row)
+            row_count += 1
+    
+    return row_count
+
+
+def _write_csv_batches(output_path: Union[str, Path], batches: Iterable["pa.RecordBatch"]) -> int:
+    """
+    Stream record batches sharing the same schema to a CSV file with Arrow's C++ writer,
+    with a header row. Nothing is written if there are no batches.
+    
+    Returns:
+        Number of rows written
+    """
+    batches = iter(batches)
+    first_batch = next(batches, None)
+    if first_batch is None:
+        return 0
+    
+    first_batch = _decode_dictionaries(first_batch)
+    row_count = first_batch.num_rows
+    write_options = pcsv.WriteOptions(include_header=True, batch_size=8192)
+    with pcsv.CSVWriter(str(output_path), first_batch.schema, write_options=write_options) as writer:
+        writer.write_batch(first_batch)
+        for batch in batches:
+            writer.write_batch(_decode_dictionaries(batch))
+            row_count += batch.num_rows
+    
+    return row_count
+
+
+def _decode_dictionaries(batch: "pa.RecordBatch") -> "pa.RecordBatch":
+    """Expand dictionary-encoded columns to plain values, as text formats have no dictionary encoding."""
+    columns = [
+        column.dictionary_decode() if pa.types.is_dictionary(column.type) else column
+        for column in batch.columns
+    ]
+    return pa.RecordBatch.from_arrays(columns, names=batch.schema.names)
+
+
+def _page_batches(pages: Iterable[PageData], columns: Dict[str, Any], batch_size: int,
+                  include_page: bool = True) -> Iterator["pa.RecordBatch"]:
+    """
+    Lay out the lines of `pages` as columnar record batches of about `batch_size` rows:
+    an int32 `page` column (if `include_page`), a `text` column, and one dictionary-encoded
+    column per entry of `columns`, repeating its value on every row.
+    """
+    batch_size = max(1, batch_size)
+    page_nums: List[int] = []
+    line_counts: List[int] = []
+    lines: List[str] = []
+    for page_data in pages:
+        content = page_data.get('content', [])
+        if not content:
+            continue
+        page_nums.append(page_data.get('page', 0))
+        line_counts.append(len(content))
+        lines.extend(content)
+        if len(lines) >= batch_size:
+            yield _lines_to_batch(page_nums, line_counts, lines, columns, include_page)
+            page_nums, line_counts, lines = [], [], []
+    
+    if lines:
+        yield _lines_to_batch(page_nums, line_counts, lines, columns, include_page)
+
+
+def _lines_to_batch(page_nums: List[int], line_counts: List[int], lines: List[str],
+                    columns: Dict[str, Any], include_page: bool) -> "pa.RecordBatch":
+    """Build one record batch for `_page_batches`."""
+    arrays = []
+    names = []
+    if include_page:
+        arrays.append(pa.array(np.repeat(np.asarray(page_nums, dtype=np.int32), line_counts)))
+        names.append('page')
+    arrays.append(pa.array(lines, type=pa.large_string()))
+    names.append('text')
+    
+    # Constant columns share a single dictionary entry
+    indices = pa.array(np.zeros(len(lines), dtype=np.int32))
+    for name, value in columns.items():
+        arrays.append(pa.DictionaryArray.from_arrays(indices, pa.array([value])))
+        names.append(name)
+    
+    return pa.RecordBatch.from_arrays(arrays, names=names)
+
+
+def _write_parquet(output_path: Union[str, Path], batches: Iterable["pa.RecordBatch"]) -> int:
+    """
+    Stream record batches sharing the same schema to a zstd-compressed Parquet file.
+    Every column except the line text repeats heavily and is dictionary-encoded.
+    Nothing is written if there are no batches.
+    
+    Returns:
+        Number of rows written
+    """
+    batches = iter(batches)
+    first_batch = next(batches, None)
+    if first_batch is None:
+        return 0
+    
+    row_count = first_batch.num_rows
+    dictionary_columns = [name for name in first_batch.schema.names if name != 'text']
+    with pq.ParquetWriter(output_path, first_batch.schema, compression='zstd',
+                          use_dictionary=dictionary_columns) as writer:
+        writer.write_batch(first_batch)
+        for batch in batches:
+            writer.write_batch(batch)
+            row_count += batch.num_rows
+    
+    return row_count
+
+
+def _report_progress(pages: Iterable[PageData], total_pages: int,
+                     progress_callback: Callable[[int, int], None]) -> Iterator[PageData]:
+    """Pass pages through, reporting (pages_done, total_pages) after each one."""
+    for pages_done, page in enumerate(pages, 1):
+        yield page
+        progress_callback(pages_done, total_pages)
+
+
+_T = TypeVar('_T')
+
+
+def _prefetch(items: Iterable[_T], max_ahead: int) -> Iterator[_T]:
+    """
+    Pass items through, producing them on a background thread up to `max_ahead` items ahead
+    of the consumer. Producer exceptions are re-raised to the consumer; if the consumer stops
+    early, the producer stops too and the source iterator is closed.
+    """
+    buffer: "queue.Queue[Tuple[bool, Any]]" = queue.Queue(max(1, max_ahead))
+    stop = threading.Event()
+    
+    def put(entry: Tuple[bool, Any]) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(entry, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+    
+    def produce() -> None:
+        source = iter(items)
+        try:
+            for item in source:
+                if not put((False, item)):
+                    return
+            put((True, None))
+        except BaseException as e:
+            put((True, e))
+        finally:
+            close = getattr(source, 'close', None)
+            if close is not None:
+                close()
+    
+    producer = threading.Thread(target=produce, name="page-prefetch", daemon=True)
+    producer.start()
+    try:
+        while True:
+            done, value = buffer.get()
+            if done:
+                if value is not None:
+                    raise value
+                return
+            yield value
+    finally:
+        stop.set()
+        producer.join()
+
 
-def parse_args():
+def _guard_extraction(pages: Iterable[PageData]) -> Iterator[PageData]:
+    """Pass pages through, re-raising errors from extracting them as _PageExtractionError."""
+    try:
+        yield from pages
+    except Exception as e:
+        raise _PageExtractionError(str(e)) from e
+
+
+def _close_when_done(pages: Iterator[PageData], document: Any) -> Iterator[PageData]:
+    """Pass pages through, closing the document they are read from once done."""
+    try:
+        yield from pages
+    finally:
+        document.close()
+
+
+def _release_when_done(pages: Iterator[PageData], key: Tuple[str, int, int],
+                       doc: "fitz.Document") -> Iterator[PageData]:
+    """Pass pages through, returning the document they are read from to the cache once done."""
+    try:
+        yield from pages
+    finally:
+        _document_cache.release(key, doc)
+
+
+def _document_metadata(info: Dict[str, Any], info_keys: Tuple[str, ...], pages: int) -> Dict[str, str]:
+    """Build the metadata dict from a document info dictionary read with an engine's `info_keys`."""
+    metadata = {field: info.get(key) or '' for field, key in zip(_METADATA_FIELDS, info_keys)}
+    metadata['pages'] = pages
+    return {k: str(v) for k, v in metadata.items()}
+
+
+def _pymupdf_metadata(doc: "fitz.Document") -> Dict[str, str]:
+    """Read document metadata from an open PyMuPDF document."""
+    try:
+        return _document_metadata(doc.metadata or {}, _PYMUPDF_INFO_KEYS, len(doc))
+    except Exception as e:
+        logger.warning(f"Failed to extract metadata: {str(e)}")
+        return {}
+
+
+def _pdfium_metadata(pdf: "pdfium.PdfDocument") -> Dict[str, str]:
+    """Read document metadata from an open PDFium document."""
+    try:
+        return _document_metadata(pdf.get_metadata_dict(), _PDFIUM_INFO_KEYS, len(pdf))
+    except Exception as e:
+        logger.warning(f"Failed to extract metadata: {str(e)}")
+        return {}
+
+
+def _pypdf_metadata(reader: PyPDF2.PdfReader) -> Dict[str, str]:
+    """Read document metadata from an open PyPDF2 reader."""
+    try:
+        return _document_metadata(reader.metadata or {}, _PYPDF_INFO_KEYS, len(reader.pages))
+    except Exception as e:
+        logger.warning(f"Failed to extract metadata: {str(e)}")
+        return {}
+
+
+def _extract_pymupdf_pages(pages: Iterable["fitz.Page"]) -> Iterator[PageData]:
+    """
+    Extract and clean the given pages of an open PyMuPDF document.
+    
+    Pages are iterated from the document rather than looked up by index,
+    which avoids walking the page tree for every page.
+    """
+    for page in pages:
+        page_num = page.number
+        try:
+            text = page.get_text("text", flags=_TEXT_FLAGS) or ""
+            
+            # Clean and split the text
+            clean_lines = _clean_lines(text)
+            
+            # Store page info with the text
+            yield {
+                'page': page_num + 1,
+                'content': clean_lines,
+                'page_size': len(text)
+            }
+            
+        except Exception as e:
+            logger.warning(f"Error extracting text from page {page_num}: {str(e)}")
+            yield {
+                'page': page_num + 1,
+                'content': [],
+                'error': str(e)
+            }
+
+
+def _extract_pdfium_pages(pdf: "pdfium.PdfDocument", page_nums: Iterable[int]) -> Iterator[PageData]:
+    """Extract and clean the given pages of an open PDFium document."""
+    for page_num in page_nums:
+        try:
+            page = pdf[page_num]
+            textpage = page.get_textpage()
+            # Pages without any characters (covers, image-only scans) are not decoded at all
+            text = (textpage.get_text_bounded() or "") if textpage.count_chars() else ""
+            textpage.close()
+            page.close()
+            
+            # Clean and split the text
+            clean_lines = _clean_lines(text)
+            
+            # Store page info with the text
+            yield {
+                'page': page_num + 1,
+                'content': clean_lines,
+                'page_size': len(text)
+            }
+            
+        except Exception as e:
+            logger.warning(f"Error extracting text from page {page_num}: {str(e)}")
+            yield {
+                'page': page_num + 1,
+                'content': [],
+                'error': str(e)
+            }
+
+
+def _extract_pypdf_pages(reader: PyPDF2.PdfReader, page_nums: Iterable[int]) -> Iterator[PageData]:
+    """Extract and clean the given pages of an open PyPDF2 reader."""
+    for page_num in page_nums:
+        try:
+            page = reader.pages[page_num]
+            text = page.extract_text() or ""
+            
+            # Clean and split the text
+            clean_lines = _clean_lines(text)
+            
+            # Store page info with the text
+            yield {
+                'page': page_num + 1,
+                'content': clean_lines,
+                'page_size': len(text)
+            }
+            
+        except Exception as e:
+            logger.warning(f"Error extracting text from page {page_num}: {str(e)}")
+            yield {
+                'page': page_num + 1,
+                'content': [],
+                'error': str(e)
+            }
+
+
+def _extract_page_range(pdf_path: str, start: int, end: int) -> List[PageData]:
+    """
+    Process pool worker: extract pages [start, end) of a PDF.
+    
+    Each worker opens its own document handle since open documents cannot be
+    shared across processes.
+    """
+    doc = fitz.open(pdf_path)
+    try:
+        return list(_extract_pymupdf_pages(doc.pages(start, end)))
+    finally:
+        doc.close()
+
+
+def parse_args() -> argparse.Namespace:
     """Parse command line arguments."""
     parser = argparse.ArgumentParser(description="Production PDF text extractor")
     
@@ -584,10 +1138,10 @@ def parse_args():
                         help="Output file or directory (created if doesn't exist)")
     parser.add_argument('-f', '--format', choices=['csv', 'json', 'parquet'], default='csv',
                         help="Output format (default: csv)")
-    parser.add_argument('-m', '--method', choices=['pypdf', 'pymupdf', 'auto'], default='auto',
-                        help="Text extraction method (default: auto)")
+    parser.add_argument('-m', '--method', choices=['pypdf', 'pymupdf', 'pdfium', 'auto'], default='pymupdf',
+                        help="Text extraction method (default: pymupdf)")
     parser.add_argument('-w', '--workers', type=int, default=4,
-                        help="Number of worker threads for directory processing (default: 4)")
+                        help="Number of worker processes for directory processing (default: 4)")
     parser.add_argument('--no-metadata', action='store_true',
                         help="Do not include PDF metadata in output")
     parser.add_argument('-v', '--verbose', action='store_true',
@@ -600,7 +1154,7 @@ def parse_args():
     return parser.parse_args()
 
 
-def main():
+def main() -> int:
     """Main entry point for the script."""
     # Parse command line arguments
     try:
@@ -624,35 +1178,37 @@ def main():
             text_only=args.text_only  # Add this line
         )
         
-        input_path = Path(args.input)
+        # Closing the processor shuts down its worker pool
+        with processor:
+            input_path = Path(args.input)
         
-        # Process based on whether input is file or directory
-        if input_path.is_file():
-            logger.info(f"Processing single file: {input_path}")
-            output_file = args.output if args.output else None
-            result = processor.process_file(input_path, output_file)
+            # Process based on whether input is file or directory
+            if input_path.is_file():
+                logger.info(f"Processing single file: {input_path}")
+                output_file = args.output if args.output else None
+                result = processor.process_file(input_path, output_file)
             
-            if result:
-                logger.info(f"Successfully processed file. Output: {result}")
-                return 0
-            else:
-                logger.error("Failed to process file")
-                return 1
+                if result:
+                    logger.info(f"Successfully processed file. Output: {result}")
+                    return 0
+                else:
+                    logger.error("Failed to process file")
+                    return 1
                 
-        elif input_path.is_dir():
-            logger.info(f"Processing directory: {input_path}")
-            results = processor.process_directory(input_path, args.output)
+            elif input_path.is_dir():
+                logger.info(f"Processing directory: {input_path}")
+                results = processor.process_directory(input_path, args.output)
             
-            if results:
-                logger.info(f"Successfully processed {len(results)} files")
-                return 0
+                if results:
+                    logger.info(f"Successfully processed {len(results)} files")
+                    return 0
+                else:
+                    logger.error("No files were successfully processed")
+                    return 1
+                
             else:
-                logger.error("No files were successfully processed")
+                logger.error(f"Input path does not exist: {input_path}")
                 return 1
-                
-        else:
-            logger.error(f"Input path does not exist: {input_path}")
-            return 1
             
     except KeyboardInterrupt:
         logger.info("Processing interrupted by user")